@@ -0,0 +1,329 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import json
+import base64
+import mmap
+import os
+from datetime import datetime
+
+from parameters.config_ceo import ceo_email, ceo_password
+
+# Optional orjson: serializes dicts straight to UTF-8 bytes a few times faster
+# than stdlib json (which goes via str and is re-encoded in the request path)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _dumps_bytes(obj):
+    """serialize to UTF-8 JSON bytes, via orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode('utf-8')
+
+# Base url for Collect Earth Online
+ceo_url = "https://app.collect.earth"
+
+# Chunk size for streaming base64 encoding. A multiple of 3 bytes, so each
+# chunk encodes to whole base64 quanta with no padding mid-stream.
+b64_chunk_size = 57 * 1024
+
+# Default timeout (seconds) applied to every CEO request unless the caller passes its own
+ceo_request_timeout = 300
+
+
+class _TimeoutSession(requests.Session):
+    """requests.Session that applies a default timeout when none is given, so no CEO call can hang forever."""
+
+    def request(self, *args, **kwargs):
+        kwargs.setdefault('timeout', ceo_request_timeout)
+        return super().request(*args, **kwargs)
+
+
+# Single session shared by all calls to app.collect.earth. The login cookie is
+# stored on the session and the underlying TCP+TLS connection is kept alive and
+# reused, instead of paying a fresh handshake for each of the three serialized
+# requests (login, create project, publish). Transient 5xx responses on login
+# and publish are retried with exponential backoff on the same connection, so a
+# flaky publish does not force the caller to redo the whole sequence: login
+# posts a small rewindable body and publishing twice is harmless. create-project
+# gets its own non-retrying adapter (requests picks the longest matching mount)
+# because its body is a one-shot streamed generator that urllib3 cannot rewind
+# (a retry would re-send an empty body), and re-posting create-project could
+# create a duplicate project if the server committed before failing.
+_retries = Retry(
+    total=5,
+    backoff_factor=0.3,
+    status_forcelist=(500, 502, 503, 504),
+    allowed_methods=('POST', 'GET'),
+)
+
+_SESSION = _TimeoutSession()
+_SESSION.headers.update({'Content-Type': 'application/json'})
+_SESSION.mount('https://', HTTPAdapter(max_retries=_retries, pool_connections=4, pool_maxsize=20))
+_SESSION.mount(f"{ceo_url}/create-project", HTTPAdapter(pool_connections=4, pool_maxsize=20))
+
+# The invariant part of the project creation payload. Only institutionId, name,
+# plotFileName and the streamed plotFileBase64 change between calls (see
+# build_and_send_project_data); everything else is serialized once at import.
+project_template = {
+    "projectTemplate": -1,
+    "useTemplatePlots": False,
+    "useTemplateWidgets": False,
+    "imageryId": 1,
+    "projectImageryList": [],
+    "aoiFeatures": [],
+    "aoiFileName": "",
+    "description": "Whisp",
+    "privacyLevel": "users",
+    "projectOptions": {
+        "showGEEScript": False,
+        "showPlotInformation": True,
+        "collectConfidence": False,
+        "autoLaunchGeoDash": True
+    },
+    "designSettings": {
+        "userAssignment": {
+            "userMethod": "none",
+            "users": [],
+            "percents": []
+        },
+        "qaqcAssignment": {
+            "qaqcMethod": "none",
+            "percent": 0,
+            "smes": [],
+            "timesToReview": 2
+        },
+        "sampleGeometries": {
+            "points": True,
+            "lines": True,
+            "polygons": True
+        }
+    },
+    "numPlots": "",
+    "plotDistribution": "shp",
+    "plotShape": "square",
+    "plotSize": "",
+    "plotSpacing": "",
+    "sampleDistribution": "center",
+    "samplesPerPlot": "1",
+    "sampleResolution": "",
+    "allowDrawnSamples": False,
+    "surveyQuestions": {
+        "0": {
+            "question": "Is this plot deforestation free?",
+            "answers": {
+                "0": {"answer": "Yes", "color": "#5eb273", "hide": False},
+                "1": {"answer": "No", "color": "#d99e2f", "hide": False}
+            },
+            "parentQuestionId": -1,
+            "parentAnswerIds": [],
+            "dataType": "text",
+            "componentType": "button",
+            "cardOrder": 1
+        }
+    },
+    "surveyRules": [],
+    "sampleFileName": "",
+    "sampleFileBase64": ""
+}
+
+# serialized template minus its closing brace, ready to prepend to the per-call fields
+_project_template_json_prefix = _dumps_bytes(project_template)[:-1]
+
+
+def login(email=ceo_email, password=ceo_password, debug=False):
+    """
+    Log in to Collect Earth Online. The session cookie is stored on the shared
+    session, so subsequent calls (project creation, publish) need no Cookie header.
+
+    Parameters:
+    - email: The email for authentication. Defaults to parameters.config_ceo value.
+    - password: The password for authentication. Defaults to parameters.config_ceo value.
+
+    Returns:
+    - True if the login succeeded, False otherwise.
+    """
+    url = f"{ceo_url}/login"
+
+    response = _SESSION.post(url, json={'email': email, 'password': password})
+
+    if response.status_code == 200:
+        if debug: print("Cookies:", _SESSION.cookies)
+        return True
+    else:
+        print('Login failed. Status code:', response.status_code)
+        print('Error message:', response.text)
+        return False
+
+
+def iter_file_b64(file_path):
+    """
+    Generator yielding the base64 encoding of a file as bytes chunks, prefixed
+    with the "data:application/zip;base64," marker expected by the CEO upload.
+    Reads the file in chunks so the full encoded blob never sits in memory;
+    can be fed straight into a requests streaming upload (data=generator).
+
+    Parameters:
+    - file_path: Path to the file to encode.
+
+    Yields:
+    - Bytes chunks of the data-uri string.
+    """
+    yield b"data:application/zip;base64,"
+
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return  # mmap cannot map an empty file
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if hasattr(mm, 'madvise'):  # hint the kernel read-ahead pattern (Linux)
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+
+            # walk the mapping with zero-copy memoryview slices, so the encoder
+            # reads straight from the page cache without a userspace copy
+            with memoryview(mm) as view:
+                for start in range(0, len(view), b64_chunk_size):
+                    with view[start:start + b64_chunk_size] as chunk:
+                        yield base64.b64encode(chunk)
+
+
+def file_to_base64(file_path):
+    """
+    Encode a file (e.g. zipped shapefile) as a base64 string for the CEO plot upload.
+    Encodes chunk by chunk (see iter_file_b64), so peak memory is bounded by the
+    output string rather than holding input and output copies at once.
+
+    Parameters:
+    - file_path: Path to the file to encode.
+
+    Returns:
+    - String of the form "data:application/zip;base64,<encoded file>".
+    """
+    encoded = bytearray()
+
+    for chunk in iter_file_b64(file_path):
+        encoded += chunk
+
+    # base64 (and the data-uri prefix) is pure ASCII, and the ascii codec is a CPython fast path
+    return encoded.decode('ascii')
+
+
+def iter_project_json(data, shapefile_path):
+    """
+    Generator yielding the project creation JSON body as bytes fragments: the
+    project dict first, then the plotFileBase64 field streamed from the
+    shapefile (see iter_file_b64). The full base64 payload never materializes
+    and requests sends the body chunked, so upload overlaps with encoding.
+
+    Parameters:
+    - data: Dictionary with the per-call fields (merged over the pre-serialized
+      project_template), without plotFileBase64.
+    - shapefile_path: Path to the zipped shapefile with the plots.
+
+    Yields:
+    - Bytes fragments of the JSON body.
+    """
+    yield _project_template_json_prefix  # invariant fields, serialized once at import
+
+    yield b',' + _dumps_bytes(data)[1:-1] + b',"plotFileBase64":"'
+
+    for chunk in iter_file_b64(shapefile_path):
+        yield chunk  # base64 (and the data-uri prefix) need no JSON escaping
+
+    yield b'"}'
+
+
+def send_project_creation_request(data, shapefile_path=None, debug=False):
+    """
+    Send the project creation payload to CEO (assumes login has been called on
+    the shared session).
+
+    Parameters:
+    - data: Dictionary with the per-call project fields (merged over
+      project_template; see build_and_send_project_data).
+    - shapefile_path: Optional path to the zipped plot shapefile. If given, the
+      plotFileBase64 field is streamed from the file rather than expected in data.
+
+    Returns:
+    - The new project id, or None if creation failed.
+    """
+    url = f"{ceo_url}/create-project"
+
+    if shapefile_path is not None:
+        response = _SESSION.post(url, data=iter_project_json(data, shapefile_path))
+    else:
+        response = _SESSION.post(url, data=_dumps_bytes({**project_template, **data}))
+
+    if response.status_code == 200:
+        project_id = response.json().get('projectId')
+        if debug: print("Response:", response.json())
+        print("Project created. Project id:", project_id)
+        return project_id
+    else:
+        print('Project creation failed. Status code:', response.status_code)
+        print('Error message:', response.text)
+        return None
+
+
+def publish_project(project_id, debug=False):
+    """
+    Publish a CEO project so it is visible to interpreters (assumes login has
+    been called on the shared session).
+
+    Parameters:
+    - project_id: Id of the project to publish (from send_project_creation_request).
+
+    Returns:
+    - True if the project was published, False otherwise.
+    """
+    url = f"{ceo_url}/publish-project?projectId={project_id}&clearSaved=true"
+
+    response = _SESSION.post(url)
+
+    if response.status_code == 200:
+        print("Project published. Project id:", project_id)
+        return True
+    else:
+        print('Project publishing failed. Status code:', response.status_code)
+        print('Error message:', response.text)
+        return False
+
+
+def build_and_send_project_data(shapefile_path, project_name=None, institution_id=None, email=ceo_email, password=ceo_password, debug=False):
+    """
+    Create and publish a CEO project from a zipped shapefile: logs in, encodes
+    the shapefile, sends the project creation request and publishes the project.
+
+    Parameters:
+    - shapefile_path: Path to the zipped shapefile with the plots.
+    - project_name: Name for the CEO project. Defaults to "whisp_<timestamp>".
+    - institution_id: Id of the CEO institution the project belongs to.
+    - email: The email for authentication. Defaults to parameters.config_ceo value.
+    - password: The password for authentication. Defaults to parameters.config_ceo value.
+
+    Returns:
+    - The new project id, or None if any step failed.
+    """
+    if project_name is None:
+        project_name = "whisp_" + datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    # only the per-call fields; the invariant template is pre-serialized at module level
+    data = {
+        "institutionId": institution_id,
+        "name": project_name,
+        "plotFileName": os.path.basename(shapefile_path)
+    }
+
+    if not login(email, password, debug=debug):
+        return None
+
+    # plotFileBase64 is streamed straight from the shapefile rather than built into the dict
+    project_id = send_project_creation_request(data, shapefile_path, debug=debug)
+
+    if project_id is not None:
+        publish_project(project_id, debug=debug)
+
+    return project_id
@@ -1,18 +1,31 @@
 import ee
 import sys
 import os
+import base64
+import json
 # from google.oauth2 import service_account
 
 #for sepal instance
 def initialize_ee():
-    """Initializes Google Earth Engine with credentials located one level up from the script's directory."""
+    """Initializes Google Earth Engine with credentials located one level up from the script's directory.
+    If the EE_PRIVATE_KEY environment variable is set (base64 encoded service account key, e.g. in serverless/CI),
+    it is used directly in-memory - no key file is decoded to disk and repeated calls do no extra work."""
     try:
         # Check if EE is already initialized
         if not ee.data._initialized:
+            ee_private_key = os.environ.get("EE_PRIVATE_KEY")
+            if ee_private_key:
+                # pass the decoded key straight to the credentials object, avoiding leaving credentials on disk
+                key_content = base64.b64decode(ee_private_key).decode("utf-8")
+                service_account = json.loads(key_content)["client_email"]
+                credentials = ee.ServiceAccountCredentials(service_account, key_data=key_content)
+                ee.Initialize(credentials)
+                print("Earth Engine has been initialized with the specified credentials.")
+                return
             # ee.Initialize()
             try:
-                ee.Initialize() #cloud project update. 
-            except: 
+                ee.Initialize() #cloud project update.
+            except:
                 print("searching for user's gee cloud project name for account linked to sepal. i.e., a python file located here: 'parameters/config_gee.py', containing: gee_cloud_project 'insert_project_name_here' ")
                 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'parameters'))
                 from config_gee import gee_cloud_project
@@ -1,26 +1,74 @@
+import re
+
+import numpy as np
 import pandas as pd
 import ee
 
 
 from parameters.config_runtime import (
-    percent_or_ha, 
+    percent_or_ha,
     geometry_area_column,
     lookup_gee_datasets_df
     )
 
+# Optional numba acceleration for the indicator/risk pipeline. When available, the
+# threshold reduction and the EUDR decision run as compiled parallel kernels fused
+# into a single pass per call; otherwise the NumPy implementations below are used.
+try:
+    from numba import njit, prange
+    numba_available = True
+except ImportError:
+    numba_available = False
+
+if numba_available:
+
+    # NB no fastmath: the block can contain NaN (missing stats) and the kernel must
+    # match the NumPy fallback, where NaN > threshold is False
+    @njit(parallel=True, cache=True)
+    def _any_above_threshold(vals, threshold):
+        """row-wise 'any value above threshold' over a contiguous 2-D float block"""
+        n, k = vals.shape
+        out = np.zeros(n, dtype=np.bool_)
+        for i in prange(n):
+            for j in range(k):
+                if vals[i, j] > threshold:
+                    out[i] = True
+                    break
+        return out
+
+    @njit(parallel=True, cache=True)
+    def _eudr_risk_codes(low_mask, more_info_mask):
+        """EUDR decision tree on boolean masks, emitting codes 0=low, 1=more_info_needed, 2=high"""
+        n = low_mask.shape[0]
+        out = np.empty(n, dtype=np.int8)
+        for i in prange(n):
+            if low_mask[i]:
+                out[i] = 0
+            elif more_info_mask[i]:
+                out[i] = 1
+            else:
+                out[i] = 2
+        return out
+
+# risk labels indexed by the codes emitted from _eudr_risk_codes
+_eudr_risk_labels = np.array(["low", "more_info_needed", "high"])
+
 def clamp(value, min_val, max_val):
     """
-    Clamp a value or a Pandas Series within a specified range.
+    Clamp a value, a NumPy array or a Pandas Series within a specified range.
 
     Args:
-        value (float, int, or pandas.Series): The value or series to be clamped.
+        value (float, int, numpy.ndarray, or pandas.Series): The value, array or series to be clamped.
         min_val (float or int): The minimum value of the range.
         max_val (float or int): The maximum value of the range.
 
     Returns:
-        float, int, or pandas.Series: The clamped value or series within the range.
+        float, int, numpy.ndarray, or pandas.Series: The clamped value, array or series within the range.
+        NB arrays are clamped in-place (and returned), avoiding a fresh allocation per call.
     """
-    if isinstance(value, pd.Series):
+    if isinstance(value, np.ndarray):
+        return np.clip(value, min_val, max_val, out=value)
+    elif isinstance(value, pd.Series):
         return value.clip(lower=min_val, upper=max_val)
     else:
         return max(min_val, min(value, max_val))
@@ -136,16 +184,17 @@ def add_eudr_risk_col(
         DataFrame: DataFrame with added 'EUDR_risk' column.
     """
 
-    for index, row in df.iterrows():
-        # If any of the first three indicators suggest low risk, set EUDR_risk to "low"
-        if row[ind_1_name] == "no" or row[ind_2_name] == "yes" or row[ind_3_name] == "yes":
-            df.at[index, 'EUDR_risk'] = "low"
-        # If none of the first three indicators suggest low risk and Indicator 4 suggests no risk, set EUDR_risk to "more_info_needed"
-        elif row[ind_4_name] == "no":
-            df.at[index, 'EUDR_risk'] = "more_info_needed"
-        # If none of the above conditions are met, set EUDR_risk to "high"
-        else:
-            df.at[index, 'EUDR_risk'] = "high"
+    # If any of the first three indicators suggest low risk, EUDR_risk is "low"
+    low_mask = (df[ind_1_name].eq("no") | df[ind_2_name].eq("yes") | df[ind_3_name].eq("yes")).to_numpy()
+
+    # If none of the first three indicators suggest low risk and Indicator 4 suggests no risk, EUDR_risk is "more_info_needed"
+    more_info_mask = df[ind_4_name].eq("no").to_numpy()
+
+    # Conditions are checked in order; anything left over is "high"
+    if numba_available:
+        df['EUDR_risk'] = _eudr_risk_labels[_eudr_risk_codes(low_mask, more_info_mask)]
+    else:
+        df['EUDR_risk'] = np.select([low_mask, more_info_mask], ["low", "more_info_needed"], default="high")
 
     return df
 
@@ -218,28 +267,37 @@ def add_indicator_column(df, input_columns, threshold, new_column_name, low_name
     Returns:
         DataFrame: The DataFrame with the new column added.
     """
-    # Create a new column and initialize with low_name
-    df[new_column_name] = low_name
-
     # if percent_or_ha == "ha": print ("output in hectares. Converting values to percent for indicator")
-        
+
+    # float32 is plenty for percent/ha stats and halves the memory traffic of the compare/clip below;
+    # the block is pulled out once here, shared by both comparison modes
+    vals = df[input_columns].to_numpy(dtype=np.float32)
+
     # Default behavior: use '>' for single column comparison
     if sum_comparison:
         # Sum all values in specified columns and compare to threshold
-        sum_values = df[input_columns].sum(axis=1)
-        df.loc[sum_values > threshold, new_column_name] = high_name
+        mask = np.nansum(vals, axis=1) > threshold  # NaNs count as 0, as with pandas sum
     else:
-        # Check if any values in specified columns are above the threshold and update the new column accordingly
-        for col in input_columns:
-            ## So that threshold is always in percent, if outputs are in ha, the code converts to percent (based on dividing by the geometry_area_column column. 
-            # Clamping is needed due to differences in decimal places (meaning input values may go just over 100)
-            if percent_or_ha == "ha": 
-                # if df[geometry_area_column]<0.01: #to add in for when points, some warning message or similar
-
-                val_to_check = clamp(((df[col] / df[geometry_area_column]) * 100),0,100)
-            else:
-                val_to_check = df[col]
-            df.loc[val_to_check > threshold, new_column_name] = high_name
+        ## So that threshold is always in percent, if outputs are in ha, the code converts to percent (based on dividing by the geometry_area_column column.
+        # Clamping is needed due to differences in decimal places (meaning input values may go just over 100)
+        # The unit branch is resolved once up front, with the area column pulled out as one array
+        if percent_or_ha == "ha":
+            # if df[geometry_area_column]<0.01: #to add in for when points, some warning message or similar
+
+            area_arr = df[geometry_area_column].to_numpy(dtype=np.float32)
+
+            # the division yields a fresh array, so the clamp can safely run in-place on it
+            vals = (vals / area_arr[:, None]) * 100
+            clamp(vals, 0, 100)
+
+        # Check if any values in specified columns are above the threshold (one pass over the contiguous block)
+        if numba_available:
+            mask = _any_above_threshold(np.ascontiguousarray(vals), np.float32(threshold))
+        else:
+            mask = (vals > threshold).any(axis=1)
+
+    df[new_column_name] = np.where(mask, high_name, low_name)
+
     return df
 
 
@@ -394,9 +452,15 @@ def add_indicator_column_from_csv(csv_file, input_columns, threshold, new_column
     Returns:
         DataFrame or None: The DataFrame with the new column added if output_file is not provided, otherwise None.
     """
-    # Read the CSV file into a DataFrame
-    df = pd.read_csv(csv_file)
-    
+    # Read the CSV file into a DataFrame. The pyarrow engine (when installed) parses
+    # multi-MB files several times faster with lower peak memory, and the indicator
+    # columns land directly in float32 rather than the float64 default
+    dtypes = {col: 'float32' for col in input_columns}
+    try:
+        df = pd.read_csv(csv_file, engine='pyarrow', dtype=dtypes)
+    except ImportError:
+        df = pd.read_csv(csv_file, dtype=dtypes)
+
     # Call the add_indicator_column function
     df = add_indicator_column(df, input_columns, threshold, new_column_name, low_name, high_name, sum_comparison)
     
@@ -421,8 +485,13 @@ def create_wildcard_column_list(df, wildcard_patterns):
     Returns:
         list: List of column names matching the wildcard patterns.
     """
-    column_lists = [df.filter(like=pattern).columns.tolist() for pattern in wildcard_patterns]
-    return [col for sublist in column_lists for col in sublist]
+    if not wildcard_patterns:
+        return []
+
+    # one compiled alternation scans the columns once, instead of a df.filter pass (and throwaway DataFrame view) per pattern
+    rx = re.compile('|'.join(re.escape(pattern) for pattern in wildcard_patterns))
+
+    return [col for col in df.columns if rx.search(col)]
 
 
 
@@ -440,16 +509,14 @@ def select_years_in_range(string_list, min_year, max_year):
     Returns:
         list: List of strings where the last four characters are in the specified range of years.
     """
+    # one compiled regex to pick out the four trailing digits, avoiding per-string int() exception handling
+    rx = re.compile(r'(\d{4})$')
+
     selected_strings = []
     for string in string_list:
-        if len(string) >= 4:
-            last_four_digits = string[-4:]
-            try:
-                year = int(last_four_digits)
-                if year in range(min_year, max_year + 1):
-                    selected_strings.append(string)
-            except ValueError:
-                pass
+        match = rx.search(string)
+        if match and min_year <= int(match.group(1)) <= max_year:
+            selected_strings.append(string)
     return selected_strings
 
 
@@ -458,13 +525,8 @@ def order_list_from_lookup(lookup_gee_datasets_df):
     return lookup_gee_datasets_df.sort_values(by=['dataset_order'])["dataset_name"].tolist() # names sorted by list
     
 def create_column_list_from_lookup(lookup_gee_datasets_df,prefix_columns_list):
-    # ordered_dataset_df= lookup_gee_datasets_df.sort_values(by=['dataset_order'])
-    
-    # column_order_list = list(ordered_dataset_df["dataset_name"])
-    column_order_list = lookup_gee_datasets_df.sort_values(by=['dataset_order'])["dataset_name"].tolist()
-
     # adds in a list of columns to the start of the order list (i.e. the geo_id, geometry area column and country columns), if left blank nothing added
-    column_order_list =  prefix_columns_list + order_list_from_lookup(lookup_gee_datasets_df)
+    column_order_list = list(prefix_columns_list) + order_list_from_lookup(lookup_gee_datasets_df)
 
     return column_order_list
     
@@ -487,15 +549,13 @@ def reorder_columns_by_lookup(df,lookup_gee_datasets_df,dataset_order_column,dat
 def make_lookup_from_feature_col(feature_col,join_column,lookup_column,join_column_new_name=False,lookup_column_new_name=False):
     """makes a lookup table (pandas dataframe) from two columns in a feature collection (duplicates removed)"""
     
-    list_join_column = feature_col.aggregate_array(join_column).getInfo()
-    
-    list_lookup_column = feature_col.aggregate_array(lookup_column).getInfo()
-    
-    #make dataframe from columns
-    lookup_table = pd.DataFrame({join_column:list_join_column,
-                                      lookup_column:list_lookup_column}) 
-    #removes duplicates
-    lookup_table= lookup_table.drop_duplicates()
+    # removes duplicates server-side, then pulls both columns in a single round trip (one [join, lookup] pair per feature)
+    rows = feature_col.distinct([join_column, lookup_column]).reduceColumns(
+        ee.Reducer.toList(2), [join_column, lookup_column]
+    ).getInfo()['list']
+
+    #make dataframe from the pairs
+    lookup_table = pd.DataFrame(rows, columns=[join_column, lookup_column])
 
     # rename columns if specified
     if join_column_new_name!=False:
@@ -1,6 +1,11 @@
 import ee
+import functools
+import math
 import pandas as pd
 
+# client-side constant folding: radius in metres of a circle of given area in km2 is sqrt(area) * 1000/sqrt(pi)
+_km2_to_radius_m_factor = 1000 / math.sqrt(math.pi)
+
 
 def remove_geometry_from_feature_collection(feature_collection):
     """ Define the function to remove geometry from features in a feature collection"""
@@ -16,21 +21,33 @@ def remove_geometry_from_feature_collection(feature_collection):
 
 
     
+@functools.lru_cache(maxsize=128)
+def get_property_names(asset_id):
+    """property names of the first feature in an asset, cached per asset id so repeated calls cost one round trip in total"""
+    return ee.FeatureCollection(asset_id).first().propertyNames().getInfo()
+
+
 def collection_properties_to_df(collection, property_selection=None):
-    """creates a pandas dataframe from feature collection properties. NB SLOW but functions >5000 rows (unlike geemap_to_df)"""
-    nested_list = []
-    
+    """creates a pandas dataframe from feature collection properties. NB functions >5000 rows (unlike geemap_to_df).
+    Accepts an asset id string for the collection, in which case the property name lookup is cached (see get_property_names).
+    For anonymous collections, pass property_selection when calling repeatedly to skip the extra name-discovery round trip."""
+    if isinstance(collection, str):
+        if property_selection is None:
+            property_selection = get_property_names(collection)
+        collection = ee.FeatureCollection(collection)
+
     if property_selection is None:
         collection_properties_list = collection.first().propertyNames().getInfo()
     else:
-        collection_properties_list = property_selection 
+        collection_properties_list = property_selection
 
-    for property in collection_properties_list:
-        nested_list.append(collection.aggregate_array(property).getInfo())
+    # single server-side reduction: one round trip for all properties (instead of one aggregate_array call each),
+    # returning one list per feature so no client-side transpose is needed
+    rows = collection.reduceColumns(
+        ee.Reducer.toList(len(collection_properties_list)), collection_properties_list
+    ).getInfo()['list']
 
-    nested_list_transposed = list(map(list, zip(*nested_list)))
-    
-    return pd.DataFrame(data=nested_list_transposed, columns=collection_properties_list)
+    return pd.DataFrame(data=rows, columns=collection_properties_list)
 
 
 
@@ -45,13 +62,12 @@ def get_centroid(feature, geo_id_column="Geo_id"):
 
 
 def buffer_point_to_required_area(feature,area,area_unit):
-    """buffers feature to get a given area (needs math library); area unit in 'ha' or 'km2' (the default)"""
-    area = feature.get('REP_AREA')
-    
+    """buffers feature to get a given area; area unit in 'ha' or 'km2' (the default)"""
     # buffer_size = get_radius_m_to_buffer_for_given_area(area,"km2")# should work but untested in this function
-    
-    buffer_size = (ee.Number(feature.get('REP_AREA')).divide(math.pi)).sqrt().multiply(1000) #calculating radius in metres from REP_AREA in km2
-    
+
+    # one sqrt and one multiply per feature (constant factor folded client-side), so the expression mapped over a collection stays small
+    buffer_size = ee.Number(feature.get('REP_AREA')).sqrt().multiply(_km2_to_radius_m_factor) #calculating radius in metres from REP_AREA in km2
+
     return ee.Feature(feature).buffer(buffer_size,1);  ### buffering (incl., max error parameter should be 0m. But put as 1m anyhow - doesn't seem to make too much of a difference for speed)
 
 